@@ -17,6 +17,12 @@ from adt_eval.base import BaseEvaluator
 from adt_press.llm.text_extraction import get_page_text
 from adt_press.models.pdf import Page
 
+# directional quotes are replaced with non-directional ones in both the LLM output and the Gold Standard
+QUOTE_FIXES = str.maketrans({"’": "'", "‘": "'", "”": '"', "“": '"'})
+
+# the Gold Standard additionally has stray soft hyphens
+GOLD_STANDARD_FIXES = str.maketrans({"’": "'", "‘": "'", "”": '"', "“": '"', "\xad": None})
+
 
 class TextTypeEvaluator(BaseEvaluator):
     """Evaluator for text type accuracy."""
@@ -54,10 +60,7 @@ class TextTypeEvaluator(BaseEvaluator):
         for group in page_texts.groups:
             for text_item in group.texts:
                 # Some mild cleaning on the text content to match the Gold Standard
-                text_item.text = text_item.text.replace("’", "'")
-                text_item.text = text_item.text.replace("”", '"')
-                text_item.text = text_item.text.replace("‘", "'")
-                text_item.text = text_item.text.replace("“", '"')
+                text_item.text = text_item.text.translate(QUOTE_FIXES)
 
                 if text_item.text not in actual_type_by_text.keys():
                     # If text does not yet appear in dictionary, insert as a 1-item list
@@ -83,11 +86,7 @@ class TextTypeEvaluator(BaseEvaluator):
             text_content = text_content.replace("\/", "/")
             text_content = text_content.replace("\\n", "\n")
             text_content = text_content.replace("  ", " ")
-            text_content = text_content.replace("’", "'")
-            text_content = text_content.replace("”", '"')
-            text_content = text_content.replace("‘", "'")
-            text_content = text_content.replace("“", '"')
-            text_content = text_content.replace("\xad", "")
+            text_content = text_content.translate(GOLD_STANDARD_FIXES)
 
             # Implement match between ground truth TT and actual LLM result, greedily taking the first text type in the list
             if text_content in actual_type_by_text:
@@ -1,13 +1,24 @@
+import asyncio
+import json
+import time
+from typing import Literal, cast, get_args
+
 import instructor
+import litellm
+import structlog
 from banks import Prompt
 from litellm import acompletion
-from pydantic import ValidationInfo, field_validator
+from openai.types.chat import ChatCompletionMessageParam
+from pydantic import ValidationError, ValidationInfo, field_validator
 
 from adt_press.models.config import PromptConfig
 from adt_press.models.text import OutputText
 from adt_press.utils.encoding import CleanTextBaseModel
 from adt_press.utils.file import cached_read_text_file
 from adt_press.utils.languages import LANGUAGE_MAP
+from adt_press.utils.sync import gather_with_limit
+
+log = structlog.get_logger()
 
 
 class TextItem(CleanTextBaseModel):
@@ -42,52 +53,199 @@ class TranslationResponse(CleanTextBaseModel):
         return v
 
 
-async def get_text_translation(
+# how often we check on the status of a submitted batch
+BATCH_POLL_SECONDS = 30
+
+# how long we wait for a submitted batch before giving up on it, matching its completion window
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_DEADLINE_SECONDS = 24 * 60 * 60
+
+# providers litellm supports batches for
+BatchProvider = Literal["openai", "azure", "vertex_ai", "bedrock", "litellm_proxy", "xai"]
+
+# batch statuses after which no further progress will be made
+BATCH_DONE_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _translation_messages(
     config: PromptConfig,
-    texts: list[tuple[str, str, str]],  # [(text_id, text_type, text)]
+    texts: list[tuple[str, str, str]],
     base_language_code: str,
     target_language_code: str,
-) -> list[OutputText]:
-    """Translate one or more texts together to maintain context."""
-    base_language = LANGUAGE_MAP[base_language_code]
-    target_language = LANGUAGE_MAP[target_language_code]
-
-    # Format texts for the prompt and collect expected IDs
-    texts_for_prompt = [{"text_id": text_id, "text": text} for text_id, _, text in texts]
-    expected_text_ids = {text_id for text_id, _, _ in texts}
-
+) -> list[ChatCompletionMessageParam]:
+    """Render the translation prompt for the passed in texts."""
     context = dict(
-        base_language=base_language,
-        target_language=target_language,
-        texts=texts_for_prompt,
+        base_language=LANGUAGE_MAP[base_language_code],
+        target_language=LANGUAGE_MAP[target_language_code],
+        texts=[{"text_id": text_id, "text": text} for text_id, _, text in texts],
         examples=config.examples,
     )
 
     prompt = Prompt(cached_read_text_file(config.template_path))
+    return [m.model_dump(exclude_none=True) for m in prompt.chat_messages(context)]
+
+
+def _output_texts(response: TranslationResponse, texts: list[tuple[str, str, str]], target_language_code: str) -> list[OutputText]:
+    """Map a translation response back to OutputText objects."""
+    text_type_map = {text_id: text_type for text_id, text_type, _ in texts}
+    return [
+        OutputText(
+            text_id=translation.text_id,
+            text_type=text_type_map[translation.text_id],
+            text=translation.text,
+            reasoning=response.reasoning,
+            language_code=target_language_code,
+        )
+        for translation in response.translations
+    ]
+
+
+async def get_text_translation(
+    config: PromptConfig,
+    texts: list[tuple[str, str, str]],  # [(text_id, text_type, text)]
+    base_language_code: str,
+    target_language_code: str,
+) -> list[OutputText]:
+    """Translate one or more texts together to maintain context."""
     client = instructor.from_litellm(acompletion)
 
     # Create validation context
     validation_context = {
-        "expected_text_ids": expected_text_ids,
+        "expected_text_ids": {text_id for text_id, _, _ in texts},
     }
 
     response: TranslationResponse = await client.chat.completions.create(
         model=config.model,
         response_model=TranslationResponse,
-        messages=[m.model_dump(exclude_none=True) for m in prompt.chat_messages(context)],
+        messages=_translation_messages(config, texts, base_language_code, target_language_code),
         max_retries=config.max_retries,
         context=validation_context,
     )
 
-    # Map back to OutputText objects
-    text_type_map = {text_id: text_type for text_id, text_type, _ in texts}
-    return [
-        OutputText(
-            text_id=translation.text_id,
-            text_type=text_type_map[translation.text_id],
-            text=translation.text,
-            reasoning=response.reasoning,
-            language_code=target_language_code,
+    return _output_texts(response, texts, target_language_code)
+
+
+async def get_text_translations_batch(
+    config: PromptConfig,
+    requests: list[tuple[list[tuple[str, str, str]], str, str]],  # [(texts, base_language_code, target_language_code)]
+) -> list[list[OutputText]]:
+    """
+    Translate many groups of texts using the provider's batch API.
+
+    All requests are submitted as a single batch file and polled until complete or our deadline passes.
+    Any request whose result is missing or fails validation is retried through the synchronous path.
+    """
+    if not requests:
+        return []
+
+    model, llm_provider, _, _ = litellm.get_llm_provider(config.model)
+    if llm_provider not in get_args(BatchProvider):
+        raise ValueError(f"Batch mode is not supported for provider: {llm_provider}")
+    provider = cast(BatchProvider, llm_provider)
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {"name": "TranslationResponse", "schema": TranslationResponse.model_json_schema()},
+    }
+
+    lines = []
+    for idx, (texts, base_language_code, target_language_code) in enumerate(requests):
+        body = dict(
+            model=model,
+            messages=_translation_messages(config, texts, base_language_code, target_language_code),
+            response_format=response_format,
         )
-        for translation in response.translations
-    ]
+        lines.append(json.dumps({"custom_id": str(idx), "method": "POST", "url": "/v1/chat/completions", "body": body}))
+
+    batch_file = ("text_translations.jsonl", "\n".join(lines).encode("utf-8"))
+    input_file = await litellm.acreate_file(file=batch_file, purpose="batch", custom_llm_provider=provider)
+    batch = await litellm.acreate_batch(
+        completion_window=BATCH_COMPLETION_WINDOW,
+        endpoint="/v1/chat/completions",
+        input_file_id=input_file.id,
+        custom_llm_provider=provider,
+    )
+
+    deadline = time.monotonic() + BATCH_DEADLINE_SECONDS
+    while batch.status not in BATCH_DONE_STATUSES:
+        if time.monotonic() >= deadline:
+            log.warning("Translation batch timed out, cancelling", batch_id=batch.id, status=batch.status)
+            batch = await litellm.acancel_batch(batch_id=batch.id, custom_llm_provider=provider)
+            break
+
+        await asyncio.sleep(BATCH_POLL_SECONDS)
+        batch = await litellm.aretrieve_batch(batch_id=batch.id, custom_llm_provider=provider)
+
+    # parse whatever results we got back, keyed by request index
+    responses: dict[int, TranslationResponse] = {}
+    if batch.output_file_id:
+        content = await litellm.afile_content(file_id=batch.output_file_id, custom_llm_provider=provider)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+
+            result = json.loads(line)
+            idx = int(result["custom_id"])
+            response_body = (result.get("response") or {}).get("body") or {}
+            choices = response_body.get("choices") or []
+            if not choices:
+                continue
+
+            texts = requests[idx][0]
+            try:
+                responses[idx] = TranslationResponse.model_validate_json(
+                    choices[0]["message"]["content"],
+                    context={"expected_text_ids": {text_id for text_id, _, _ in texts}},
+                )
+            except ValidationError:
+                continue
+
+    fallback_count = len(requests) - len(responses)
+    if batch.status != "completed" or batch.output_file_id is None:
+        log.warning(
+            "Translation batch did not complete, falling back to synchronous requests",
+            batch_id=batch.id,
+            status=batch.status,
+            error_file_id=batch.error_file_id,
+            fallback_count=fallback_count,
+        )
+    elif fallback_count:
+        log.warning(
+            "Translation batch results missing or invalid, falling back to synchronous requests",
+            batch_id=batch.id,
+            error_file_id=batch.error_file_id,
+            fallback_count=fallback_count,
+        )
+
+    # answered requests are already in memory, only our fallbacks need to go through the rate limiter
+    results = {idx: _output_texts(response, requests[idx][0], requests[idx][2]) for idx, response in responses.items()}
+
+    # fall back to the synchronous path, which has validation retries
+    fallback_idxs = [idx for idx in range(len(requests)) if idx not in responses]
+    fallbacks = [get_text_translation(config, *requests[idx]) for idx in fallback_idxs]
+    results.update(zip(fallback_idxs, await gather_with_limit(fallbacks, config.rate_limit, config.max_concurrency)))
+
+    return [results[idx] for idx in range(len(requests))]
+
+
+async def get_text_translations(
+    config: PromptConfig,
+    requests: list[tuple[list[tuple[str, str, str]], str, str]],  # [(texts, base_language_code, target_language_code)]
+) -> list[list[OutputText]]:
+    """Translate each group of texts, using the batch API if configured."""
+    if config.batch_mode == "batch":
+        return await get_text_translations_batch(config, requests)
+
+    tasks = [get_text_translation(config, texts, base, target) for texts, base, target in requests]
+    return await gather_with_limit(tasks, config.rate_limit, config.max_concurrency)
+
+
+async def get_text_translations_bulk(
+    config: PromptConfig,
+    groups: list[list[tuple[str, str, str]]],  # [[(text_id, text_type, text)]]
+    base_language_code: str,
+    target_language_codes: list[str],
+) -> list[OutputText]:
+    """Translate every group of texts into every target language concurrently, returning a flat list."""
+    requests = [(texts, base_language_code, target) for target in target_language_codes for texts in groups]
+    results = await get_text_translations(config, requests)
+    return [text for result in results for text in result]
@@ -1,6 +1,6 @@
 import enum
 import os
-from typing import Self
+from typing import Literal, Self
 
 import yaml
 from pydantic import BaseModel, Field, model_validator
@@ -79,8 +79,12 @@ class PromptConfig(PathHashMixin):
     examples: list[dict] = []
 
     rate_limit: int = 300
+    max_concurrency: int = 100
     max_retries: int = 10
 
+    # sync runs each request as it is made, batch submits them together via the provider batch API
+    batch_mode: Literal["sync", "batch"] = "sync"
+
 
 class SpeechPromptConfig(PromptConfig):
     voice: str = "alloy"
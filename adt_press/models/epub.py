@@ -1,11 +1,26 @@
+import zipfile
 from typing import Optional
 
 from ebooklib import epub
 
-from adt_press.models.plate import Plate, PlateImage, PlateText
+from adt_press.models.plate import PlateImage, PlateText
 from adt_press.models.web import WebPage
-from adt_press.utils.file import cached_read_file
-from adt_press.utils.html import replace_images, replace_texts
+from adt_press.utils.archive import MediaZipFile
+from adt_press.utils.html import replace_images_and_texts
+
+
+class MediaEpubWriter(epub.EpubWriter):
+    """EpubWriter that stores already compressed media as-is instead of deflating it again."""
+
+    def write(self) -> None:
+        self.out = MediaZipFile(self.file_name, "w", zipfile.ZIP_DEFLATED, compresslevel=self.options.get("compresslevel", 6))
+        self.out.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+
+        self._write_container()
+        self._write_opf()
+        self._write_items()
+
+        self.out.close()
 
 
 def create_epub_file(
@@ -13,10 +28,11 @@ def create_epub_file(
     title: str,
     language: str,
     author: str,
-    plate: Plate,
+    plate_images: dict[str, PlateImage],
     web_pages: list[WebPage],
     plate_texts: dict[str, PlateText],
     translations: dict[str, str],
+    image_bytes: dict[str, bytes],
     image_dir: str,
     css_content: Optional[str] = None,
 ) -> str:
@@ -28,10 +44,11 @@ def create_epub_file(
         title: Book title
         language: Primary language code (e.g., 'es', 'en')
         author: Book author
-        plate: Plate object with book structure
+        plate_images: Dictionary of image elements by ID
         web_pages: List of generated web pages
         plate_texts: Dictionary of text elements by ID
         translations: Dictionary of translated text by text_id
+        image_bytes: Dictionary of image contents by image_id
         image_dir: Directory containing images
         css_content: Optional CSS styling
 
@@ -52,31 +69,20 @@ def create_epub_file(
         css = epub.EpubItem(uid="style", file_name="style.css", media_type="text/css", content=css_content)
         book.add_item(css)
 
-    # Add images
-    images_by_id: dict[str, PlateImage] = {img.image_id: img for img in plate.images}
-    texts_by_id: dict[str, PlateText] = {txt.text_id: txt for txt in plate.texts}
-
-    image_items = {}
-
-    # add all our images to the book
-    for webpage in web_pages:
-        for image_id in webpage.image_ids:
-            img = images_by_id[image_id]
-            img_bytes = cached_read_file(img.image_path)
-            img_item = epub.EpubItem(uid=img.image_id, file_name=f"images/{image_id}.png", media_type="image/png", content=img_bytes)
+    # Add images, once each even if used by multiple web pages
+    image_ids = dict.fromkeys(image_id for webpage in web_pages for image_id in webpage.image_ids)
 
-            # replace our PlateImage with one that has the correct path
-            images_by_id[image_id] = PlateImage(image_id=img.image_id, image_path=f"images/{image_id}.png", caption_id=img.caption_id)
+    # the path of each image within the book
+    image_paths = {image_id: f"images/{image_id}.png" for image_id in image_ids}
 
-            book.add_item(img_item)
-            image_items[image_id] = img_item
+    for image_id, image_path in image_paths.items():
+        img_item = epub.EpubItem(uid=image_id, file_name=image_path, media_type="image/png", content=image_bytes[image_id])
+        book.add_item(img_item)
 
     # Create chapters from web pages
     chapters = []
     for idx, webpage in enumerate(web_pages):
-        content = webpage.content
-        content = replace_images(content, images_by_id, texts_by_id)
-        content = replace_texts(content, texts_by_id)
+        content = replace_images_and_texts(webpage.content, plate_images, plate_texts, image_paths)
 
         chapter = epub.EpubHtml(title=f"Section {idx + 1}", file_name=f"chap_{webpage.section_id}.xhtml", lang=language)
         chapter.content = f"{content}"
@@ -107,6 +113,8 @@ def create_epub_file(
     book.spine = ["nav"] + chapters
 
     # Write EPUB file
-    epub.write_epub(output_path, book)
+    writer = MediaEpubWriter(output_path, book)
+    writer.process()
+    writer.write()
 
     return output_path
@@ -1,12 +1,35 @@
+import hashlib
 import json
+import multiprocessing
 import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
 
 from hamilton.function_modifiers import cache
 
 from adt_press.models.config import TemplateConfig
-from adt_press.models.epub import create_epub_file
+from adt_press.models.epub import MediaEpubWriter, create_epub_file
 from adt_press.models.plate import Plate
 from adt_press.models.web import WebPage
+from adt_press.utils.archive import MediaZipFile, code_fingerprint, restore_archive, store_archive
+from adt_press.utils.file import read_file
+from adt_press.utils.html import replace_images_and_texts
+
+# inputs shared by every epub we build in this process, set once per worker so they aren't sent with every language
+EPUB_INPUTS: dict[str, Any] = {}
+
+
+def _init_epub_worker(shared_inputs: bytes) -> None:
+    """Loads the serialized inputs shared by all our epubs."""
+    EPUB_INPUTS.clear()
+    EPUB_INPUTS.update(pickle.loads(shared_inputs))
+
+
+def _create_language_epub(language: str, translations: dict[str, str], output_path: str) -> str:
+    """Builds the epub for a single language from our shared inputs."""
+    return create_epub_file(output_path=output_path, language=language, translations=translations, **EPUB_INPUTS)
 
 
 @cache(behavior="recompute")
@@ -42,20 +65,22 @@ def package_epub(
             config_data = json.loads(original_config_text)
         except json.JSONDecodeError:
             config_data = None
-        if config_data is not None:
+        # only rewrite (and later restore) the config if the tutorial is actually enabled
+        if config_data is not None and config_data.get("features", {}).get("showTutorial") is not False:
             features = config_data.setdefault("features", {})
             features["showTutorial"] = False
 
             with open(config_path, "w", encoding="utf-8") as config_file:
-                json.dump(
-                    config_data,
-                    config_file,
-                    ensure_ascii=False,
-                    indent=2,
-                )
+                config_file.write(json.dumps(config_data, ensure_ascii=False, indent=2))
             config_modified = True
 
+    # build our lookups once, these are shared across all languages
     plate_texts = {txt.text_id: txt for txt in plate.texts}
+    plate_images = {img.image_id: img for img in plate.images}
+
+    # read each image used by our web pages once
+    image_ids = {image_id for webpage in web_pages for image_id in webpage.image_ids}
+    image_bytes = {image_id: read_file(plate_images[image_id].image_path) for image_id in image_ids}
 
     # Load CSS if available
     css_content = None
@@ -64,25 +89,81 @@ def package_epub(
         with open(css_path, "r") as f:
             css_content = f.read()
 
+    # our epubs are fully determined by these inputs and the code building them, so previous builds can be reused
+    # while both are unchanged
+    archive_cache_dir = os.path.join(run_output_dir_config, "cache", "archives")
+    inputs_hash = hashlib.sha256()
+    inputs_hash.update(
+        code_fingerprint(
+            sys.modules[__name__],
+            create_epub_file,
+            MediaEpubWriter,
+            MediaZipFile,
+            replace_images_and_texts,
+            distributions=("ebooklib", "beautifulsoup4"),
+        )
+    )
+    inputs_hash.update(json.dumps([pdf_title_config, css_content]).encode("utf-8"))
+    inputs_hash.update(plate.model_dump_json().encode("utf-8"))
+    for webpage in web_pages:
+        inputs_hash.update(webpage.model_dump_json().encode("utf-8"))
+    for image_id in sorted(image_ids):
+        inputs_hash.update(image_id.encode("utf-8"))
+        inputs_hash.update(image_bytes[image_id])
+
     try:
+        # restore any epubs we've built before, collecting the ones we still need to build
+        pending: dict[str, tuple[str, str, dict[str, str]]] = {}
         for language, translations in plate_translations.items():
             epub_filename = f"{pdf_title_config}_{language}.epub"
             epub_path = os.path.join(run_output_dir_config, epub_filename)
+            epub_paths[language] = epub_filename
 
-            create_epub_file(
-                output_path=epub_path,
-                title=pdf_title_config,
-                language=language,
-                author="ADT Press",
-                plate=plate,
-                web_pages=web_pages,
-                plate_texts=plate_texts,
-                translations=translations,
-                image_dir=image_dir,
-                css_content=css_content,
-            )
+            language_hash = inputs_hash.copy()
+            language_hash.update(json.dumps([language, translations], sort_keys=True).encode("utf-8"))
+            key = language_hash.hexdigest()
 
-            epub_paths[language] = epub_filename
+            if not restore_archive(archive_cache_dir, key, epub_path):
+                pending[key] = (language, epub_path, translations)
+
+        # everything but the language and its translations is shared across our epubs
+        shared_inputs: dict[str, Any] = dict(
+            title=pdf_title_config,
+            author="ADT Press",
+            plate_images=plate_images,
+            web_pages=web_pages,
+            plate_texts=plate_texts,
+            image_bytes=image_bytes,
+            image_dir=image_dir,
+            css_content=css_content,
+        )
+
+        # a single epub isn't worth starting a worker for
+        if len(pending) == 1:
+            key, (language, epub_path, translations) = next(iter(pending.items()))
+            create_epub_file(output_path=epub_path, language=language, translations=translations, **shared_inputs)
+            store_archive(archive_cache_dir, key, epub_path)
+
+        # otherwise each language is independent and CPU bound, so build them in parallel, serializing our shared
+        # inputs once and sending them to each worker when it starts rather than with every language
+        elif pending:
+            max_workers = min(len(pending), os.cpu_count() or 1)
+            initargs = (pickle.dumps(shared_inputs, protocol=pickle.HIGHEST_PROTOCOL),)
+
+            # we may have background threads running by now (litellm and mlflow callbacks), which isn't safe to fork
+            mp_context = multiprocessing.get_context("forkserver")
+            with ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=mp_context, initializer=_init_epub_worker, initargs=initargs
+            ) as executor:
+                futures = {
+                    key: (epub_path, executor.submit(_create_language_epub, language, translations, epub_path))
+                    for key, (language, epub_path, translations) in pending.items()
+                }
+
+                # wait for all our epubs, raising any errors, and cache them for later runs
+                for key, (epub_path, future) in futures.items():
+                    future.result()
+                    store_archive(archive_cache_dir, key, epub_path)
     finally:
         if config_modified and original_config_text is not None:
             with open(config_path, "w", encoding="utf-8") as config_file:
@@ -3,7 +3,7 @@ import json
 from hamilton.function_modifiers import cache
 
 from adt_press.llm.glossary_translation import get_glossary_translation
-from adt_press.llm.text_translation import get_text_translation
+from adt_press.llm.text_translation import get_text_translations_bulk
 from adt_press.models.config import PromptConfig
 from adt_press.models.image import ImageCaption, ProcessedImage
 from adt_press.models.pdf import Page
@@ -197,22 +197,11 @@ def plate_output_texts_by_id(
             for text_id, text_type, text_content in texts_to_process
         }
 
-    # Handle translation case
-    async def translate_texts():
-        tasks = [
-            get_text_translation(
-                text_translation_prompt_config,
-                [(text_id, text_type, text_content)],
-                input_language_config,
-                plate_language_config,
-            )
-            for text_id, text_type, text_content in texts_to_process
-        ]
-        return await gather_with_limit(tasks, text_translation_prompt_config.rate_limit)
-
-    results = run_async_task(translate_texts)
-    # Flatten results - each result is a list with one item
-    texts = [text for result_list in results for text in result_list]
+    # Handle translation case, each text is translated on its own
+    groups = [[text] for text in texts_to_process]
+    texts = run_async_task(
+        lambda: get_text_translations_bulk(text_translation_prompt_config, groups, input_language_config, [plate_language_config])
+    )
     return {t.text_id: t for t in texts}
 
 
@@ -236,57 +225,38 @@ def plate_translations(
     # Identify texts not in any group
     ungrouped_text_ids = set(plate_texts_by_id.keys()) - text_ids_in_groups
 
-    async def translate_texts():
-        tasks = []
-        for output_language in output_languages_config:
-            if output_language == plate_language_config:
-                plate_translations[output_language] = {t.text_id: t.text for t in plate_texts}
-                continue
-
-            plate_translations[output_language] = {}
-
-            # Process each group together to maintain context
-            for group in plate_groups:
-                # Gather all texts in this group
-                group_texts = []
-                for text_id in group.text_ids:
-                    if text_id in plate_texts_by_id:
-                        text = plate_texts_by_id[text_id]
-                        group_texts.append((text.text_id, text.text_type, text.text))
-
-                # Skip empty groups
-                if not group_texts:
-                    continue
-
-                # Translate the entire group at once
-                tasks.append(
-                    get_text_translation(
-                        text_translation_prompt_config,
-                        group_texts,
-                        plate_language_config,
-                        output_language,
-                    )
-                )
-
-            # Process ungrouped texts individually (as single-item groups)
-            for text_id in ungrouped_text_ids:
+    # Process each group together to maintain context
+    groups: list[list[tuple[str, str, str]]] = []
+    for group in plate_groups:
+        # Gather all texts in this group
+        group_texts = []
+        for text_id in group.text_ids:
+            if text_id in plate_texts_by_id:
                 text = plate_texts_by_id[text_id]
-                tasks.append(
-                    get_text_translation(
-                        text_translation_prompt_config,
-                        [(text.text_id, text.text_type, text.text)],
-                        plate_language_config,
-                        output_language,
-                    )
-                )
-
-        return await gather_with_limit(tasks, text_translation_prompt_config.rate_limit)
-
-    results = run_async_task(translate_texts)
+                group_texts.append((text.text_id, text.text_type, text.text))
+
+        # Skip empty groups
+        if group_texts:
+            groups.append(group_texts)
+
+    # Process ungrouped texts individually (as single-item groups)
+    for text_id in ungrouped_text_ids:
+        text = plate_texts_by_id[text_id]
+        groups.append([(text.text_id, text.text_type, text.text)])
+
+    target_languages = []
+    for output_language in output_languages_config:
+        if output_language == plate_language_config:
+            plate_translations[output_language] = {t.text_id: t.text for t in plate_texts}
+        else:
+            plate_translations[output_language] = {}
+            target_languages.append(output_language)
 
-    # Flatten the results - all results are now lists
-    for result_list in results:
-        for text in result_list:
-            plate_translations[text.language_code][text.text_id] = text.text
+    # Translate all groups into all languages at once
+    texts = run_async_task(
+        lambda: get_text_translations_bulk(text_translation_prompt_config, groups, plate_language_config, target_languages)
+    )
+    for output_text in texts:
+        plate_translations[output_text.language_code][output_text.text_id] = output_text.text
 
     return plate_translations
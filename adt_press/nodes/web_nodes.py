@@ -12,7 +12,7 @@ from adt_press.models.plate import Plate, PlateImage, PlateText
 from adt_press.models.section import GlossaryItem
 from adt_press.models.speech import SpeechFile
 from adt_press.models.web import RenderTextGroup, WebPage
-from adt_press.utils.html import render_template, replace_images, replace_texts
+from adt_press.utils.html import render_template, replace_images, replace_images_and_texts
 from adt_press.utils.sync import gather_with_limit, run_async_task
 from adt_press.utils.web_assets import build_web_assets
 
@@ -142,9 +142,7 @@ def package_adt_web(
 
             shutil.copy(image.image_path, os.path.join(image_dir, f"{image_id}.png"))
 
-        content = webpage.content
-        content = replace_images(content, images, plate_texts)
-        content = replace_texts(content, plate_texts)
+        content = replace_images_and_texts(webpage.content, images, plate_texts)
 
         render_template(
             template_config,
@@ -1,7 +1,9 @@
+import hashlib
 import json
 import os
-import shutil
-from datetime import datetime
+import sys
+import zipfile
+from datetime import datetime, timezone
 
 from hamilton.function_modifiers import cache
 
@@ -10,6 +12,20 @@ from adt_press.models.plate import Plate
 from adt_press.models.section import GlossaryItem
 from adt_press.models.speech import SpeechFile
 from adt_press.models.web import WebPage
+from adt_press.utils.archive import MediaZipFile, code_fingerprint, restore_archive, store_archive
+from adt_press.utils.file import calculate_file_hash
+
+# mime types for the resources in our webpub manifest, keyed by file extension
+MIME_TYPES = {
+    "html": "text/html",
+    "css": "text/css",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "mp3": "audio/mpeg",
+    "js": "application/javascript",
+    "json": "application/json",
+}
 
 
 @cache(behavior="recompute")
@@ -31,14 +47,16 @@ def package_webpub(
     reading_order: list[dict[str, str]] = []
     resources: list[dict[str, str]] = []
 
+    # our modified time is filled in once we know what files we are packaging
+    metadata = {
+        "@type": "http://schema.org/Book",
+        "title": pdf_title_config,
+        "language": default_language,
+    }
+
     manifest = {
         "@context": "https://readium.org/webpub-manifest/context.jsonld",
-        "metadata": {
-            "@type": "http://schema.org/Book",
-            "title": pdf_title_config,
-            "language": default_language,
-            "modified": datetime.now().isoformat(),
-        },
+        "metadata": metadata,
         "links": [
             {
                 "rel": "self",
@@ -58,16 +76,13 @@ def package_webpub(
         }
         reading_order.append(page_entry)
 
-    webpub_dir = os.path.join(run_output_dir_config, "webpub")
-    if os.path.exists(webpub_dir):
-        shutil.rmtree(webpub_dir)  # pragma: no cover
-
-    # copy all our assets over from our built adt directory
+    # we package all our assets straight from our built adt directory
     adt_dir = os.path.join(run_output_dir_config, "adt")
-    shutil.copytree(adt_dir, webpub_dir)
 
     # Adjust packaged config to disable UI affordances not needed offline.
-    config_path = os.path.join(webpub_dir, "assets", "config.json")
+    config_href = "assets/config.json"
+    config_path = os.path.join(adt_dir, "assets", "config.json")
+    packaged_config: str | None = None
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as config_file:
             web_config = json.load(config_file)
@@ -76,50 +91,68 @@ def package_webpub(
         features["showNavigationControls"] = False
         features["showTutorial"] = False
 
-        with open(config_path, "w", encoding="utf-8") as config_file:
-            json.dump(web_config, config_file, ensure_ascii=False, indent=2)
-
-    # now add all our resources to the manifest
-    for root, dirs, files in os.walk(webpub_dir):
-        for file in files:
-            file_path = os.path.relpath(os.path.join(root, file), webpub_dir)
-            mime_type = "application/octet-stream"
-            if file.endswith(".html"):
-                mime_type = "text/html"
-            elif file.endswith(".css"):
-                mime_type = "text/css"
-            elif file.endswith(".png"):
-                mime_type = "image/png"
-            elif file.endswith(".jpg") or file.endswith(".jpeg"):
-                mime_type = "image/jpeg"
-            elif file.endswith(".mp3"):
-                mime_type = "audio/mpeg"
-            elif file.endswith(".js"):
-                mime_type = "application/javascript"
-            elif file.endswith(".json"):
-                mime_type = "application/json"
-
-            resource_entry = {
-                "href": file_path.replace("\\", "/"),
-                "type": mime_type,
-            }
-
-            resources.append(resource_entry)
-
-    # write out the manifest file
-    manifest_path = os.path.join(webpub_dir, "manifest.json")
-    with open(manifest_path, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=4)
-
-    # zip it into a standalone webpub file
+        packaged_config = json.dumps(web_config, ensure_ascii=False, indent=2)
+
+    # collect all the files we package, walking with scandir avoids an extra stat per entry
+    files_by_href: dict[str, str] = {}
+    modified = 0.0
+    dirs = [(adt_dir, "")]
+    while dirs:
+        dir_path, href_prefix = dirs.pop()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                href = href_prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append((entry.path, href + "/"))
+                elif entry.is_file():
+                    files_by_href[href] = entry.path
+                    modified = max(modified, entry.stat().st_mtime)
+
+    # we write our own manifest, so never package a stale one
+    files_by_href.pop("manifest.json", None)
+
+    # our publication was last modified when its newest file was, in UTC so identical inputs give identical manifests
+    metadata["modified"] = datetime.fromtimestamp(modified, tz=timezone.utc).isoformat()
+
+    # now add all our resources to the manifest, sorted so our output is stable across runs
+    files = sorted(files_by_href.items(), key=lambda f: f[0])
+    for href, _ in files:
+        extension = href.rpartition(".")[2]
+        mime_type = MIME_TYPES.get(extension, "application/octet-stream")
+
+        resource_entry = {
+            "href": href,
+            "type": mime_type,
+        }
+
+        resources.append(resource_entry)
+
     webpub_filename = f"{pdf_title_config}.webpub"
     webpub_path = os.path.join(run_output_dir_config, webpub_filename)
-    shutil.make_archive(
-        base_name=webpub_path.replace(".webpub", ""),
-        format="zip",
-        root_dir=webpub_dir,
-    )
-    # rename .zip to .webpub
-    os.rename(webpub_path.replace(".webpub", ".zip"), webpub_path)
+
+    # our webpub is fully determined by our manifest inputs, packaged files and the code building it, reuse previous
+    # builds while they are unchanged
+    archive_cache_dir = os.path.join(run_output_dir_config, "cache", "archives")
+    inputs_hash = hashlib.sha256()
+    inputs_hash.update(code_fingerprint(sys.modules[__name__], MediaZipFile))
+    inputs_hash.update(json.dumps([pdf_title_config, default_language, reading_order, packaged_config]).encode("utf-8"))
+    for href, file_path in files:
+        inputs_hash.update(f"{href}:{calculate_file_hash(file_path)}".encode("utf-8"))
+    key = inputs_hash.hexdigest()
+
+    if restore_archive(archive_cache_dir, key, webpub_path):
+        return "done"
+
+    # stream everything into a standalone webpub file, including our manifest, media is stored as-is
+    with MediaZipFile(webpub_path, "w", compression=zipfile.ZIP_DEFLATED) as webpub:
+        for href, file_path in files:
+            if href == config_href and packaged_config is not None:
+                webpub.writestr(href, packaged_config)
+            else:
+                webpub.write(file_path, arcname=href)
+
+        webpub.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=4))
+
+    store_archive(archive_cache_dir, key, webpub_path)
 
     return "done"
@@ -0,0 +1,97 @@
+import hashlib
+import importlib.metadata
+import inspect
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import TYPE_CHECKING
+
+from adt_press.utils.file import read_file
+
+if TYPE_CHECKING:
+    from _typeshed import SizedBuffer
+
+# already compressed formats that gain nothing from being deflated again
+STORED_EXTENSIONS = {"png", "jpg", "jpeg", "mp3"}
+
+
+def is_stored(name: str) -> bool:
+    """Whether the passed in file should be stored uncompressed in an archive."""
+    return name.rpartition(".")[2].lower() in STORED_EXTENSIONS
+
+
+class MediaZipFile(zipfile.ZipFile):
+    """ZipFile that stores already compressed media as-is instead of deflating it again."""
+
+    def write(
+        self,
+        filename: str | os.PathLike[str],
+        arcname: str | os.PathLike[str] | None = None,
+        compress_type: int | None = None,
+        compresslevel: int | None = None,
+    ) -> None:
+        if compress_type is None and is_stored(os.fspath(arcname if arcname is not None else filename)):
+            compress_type = zipfile.ZIP_STORED
+
+        super().write(filename, arcname, compress_type, compresslevel)
+
+    def writestr(
+        self,
+        zinfo_or_arcname: str | zipfile.ZipInfo,
+        data: "str | SizedBuffer",
+        compress_type: int | None = None,
+        compresslevel: int | None = None,
+    ) -> None:
+        if compress_type is None and isinstance(zinfo_or_arcname, str) and is_stored(zinfo_or_arcname):
+            compress_type = zipfile.ZIP_STORED
+
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+
+def code_fingerprint(*objects: object, distributions: tuple[str, ...] = ()) -> bytes:
+    """Digest of the source files defining the passed in objects and the versions of the passed in distributions."""
+    digest = hashlib.sha256()
+    for source_path in sorted({inspect.getfile(obj) for obj in objects}):  # type: ignore[arg-type]
+        digest.update(read_file(source_path))
+    for distribution in distributions:
+        digest.update(f"{distribution}=={importlib.metadata.version(distribution)}".encode("utf-8"))
+    return digest.digest()
+
+
+def archive_cache_path(cache_dir: str, key: str, output_path: str) -> str:
+    """Path of the cached copy of an archive, one directory per output name, keyed by a hash of its contents."""
+    output_name = os.path.basename(output_path)
+    return os.path.join(cache_dir, output_name, key + os.path.splitext(output_name)[1])
+
+
+def restore_archive(cache_dir: str, key: str, output_path: str) -> bool:
+    """Copies a previously built archive with the same key to output_path, returning whether one existed."""
+    cached_path = archive_cache_path(cache_dir, key, output_path)
+    if not os.path.exists(cached_path):
+        return False
+
+    shutil.copyfile(cached_path, output_path)
+    return True
+
+
+def store_archive(cache_dir: str, key: str, output_path: str) -> None:
+    """Stores a copy of a freshly built archive so later builds with the same key can reuse it, replacing older ones."""
+    cached_path = archive_cache_path(cache_dir, key, output_path)
+    output_cache_dir = os.path.dirname(cached_path)
+    os.makedirs(output_cache_dir, exist_ok=True)
+
+    # copy to a temporary file first so an interrupted copy never leaves a truncated archive under our key
+    fd, temp_path = tempfile.mkstemp(dir=output_cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(output_path, temp_path)
+        os.replace(temp_path, cached_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    # we only keep the latest archive for each output, older ones would never be reused
+    for entry in os.scandir(output_cache_dir):
+        if entry.path != cached_path:
+            os.remove(entry.path)
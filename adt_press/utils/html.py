@@ -6,38 +6,52 @@ from bs4 import BeautifulSoup
 from adt_press.models.config import TemplateConfig
 from adt_press.models.plate import PlateImage, PlateText
 
+# the tags whose text we replace by data-id
+TEXT_TAGS = ["h1", "h2", "h3", "p", "span"]
 
-def replace_images(html_content: str, image_replacements: dict[str, PlateImage], text_replacements: dict[str, PlateText]) -> str:
-    soup = BeautifulSoup(html_content, "html.parser")
 
+def _replace_images(
+    soup: BeautifulSoup, image_replacements: dict[str, PlateImage], text_replacements: dict[str, PlateText], image_paths: dict[str, str]
+):
     for tag in soup.find_all("img"):
         if tag.get("data-id") in image_replacements:
             img = image_replacements[tag["data-id"]]
-            tag["src"] = img.image_path
+            tag["src"] = image_paths.get(img.image_id, img.image_path)
             caption = text_replacements.get(img.caption_id)
             if caption:
                 tag["alt"] = caption.text
 
-    return str(soup)
-
-
-def replace_texts(html_content: str, text_replacements: dict[str, PlateText]) -> str:
-    soup = BeautifulSoup(html_content, "html.parser")
 
+def _replace_texts(soup: BeautifulSoup, text_replacements: dict[str, PlateText]):
     # NOTE: setting tag.string overwrites child nodes.
     # Assumes these tags are plain text.
-    for tag in soup.find_all(
-        [
-            "h1",
-            "h2",
-            "h3",
-            "p",
-            "span",
-        ]
-    ):
+    for tag in soup.find_all(TEXT_TAGS):
         if tag.get("data-id") in text_replacements:
             tag.string = text_replacements[tag["data-id"]].text
 
+
+def replace_images(
+    html_content: str,
+    image_replacements: dict[str, PlateImage],
+    text_replacements: dict[str, PlateText],
+    image_paths: dict[str, str] | None = None,
+) -> str:
+    """Replaces image sources and alt text, image_paths optionally overrides the path of an image by id."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    _replace_images(soup, image_replacements, text_replacements, image_paths or {})
+    return str(soup)
+
+
+def replace_images_and_texts(
+    html_content: str,
+    image_replacements: dict[str, PlateImage],
+    text_replacements: dict[str, PlateText],
+    image_paths: dict[str, str] | None = None,
+) -> str:
+    """Same as replace_images, but also replaces the text of tags by data-id, parsing and serializing the content once."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    _replace_images(soup, image_replacements, text_replacements, image_paths or {})
+    _replace_texts(soup, text_replacements)
     return str(soup)
 
 
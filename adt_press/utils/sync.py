@@ -1,5 +1,5 @@
 import asyncio
-from typing import Any, Awaitable, Callable, Coroutine, List, Never, TypeVar
+from typing import Any, Awaitable, Callable, Coroutine, List, Sequence, TypeVar
 
 from asynciolimiter import Limiter
 
@@ -12,10 +12,10 @@ def run_async_task(task: Callable[[], Coroutine[Any, Any, T]]) -> T:
     return asyncio.run(task())
 
 
-async def gather_with_limit(fs: List[Awaitable[Never]], rate_limit: int) -> List[T]:
+async def gather_with_limit(fs: Sequence[Awaitable[T]], rate_limit: int, max_concurrency: int = 100) -> List[T]:
     """Gather async tasks with a rate limit."""
     rate_limiter = Limiter(rate_limit / 60)  # ops/sec
-    concurrency_limiter = asyncio.Semaphore(100)  # max concurrent tasks
+    concurrency_limiter = asyncio.Semaphore(max_concurrency)  # max concurrent tasks
 
     async def run_task(f: Awaitable[T]) -> T:
         async with concurrency_limiter:
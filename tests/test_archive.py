@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from adt_press.utils.archive import MediaZipFile, code_fingerprint, restore_archive, store_archive
+
+
+class TestMediaZipFile(unittest.TestCase):
+    """Test MediaZipFile picks compression based on file extension."""
+
+    def test_media_is_stored(self):
+        """Test that compressed media is stored while everything else is deflated."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "image.PNG")
+            with open(image_path, "wb") as f:
+                f.write(b"png")
+
+            archive_path = os.path.join(temp_dir, "archive.zip")
+            with MediaZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.write(image_path, arcname="images/image.PNG")
+                archive.writestr("sounds/drop.mp3", b"mp3")
+                archive.writestr("index.html", "<html></html>")
+                archive.writestr("forced.png", b"png", compress_type=zipfile.ZIP_DEFLATED)
+
+            with zipfile.ZipFile(archive_path) as archive:
+                compression = {info.filename: info.compress_type for info in archive.infolist()}
+                self.assertEqual(archive.read("images/image.PNG"), b"png")
+
+        self.assertEqual(compression["images/image.PNG"], zipfile.ZIP_STORED)
+        self.assertEqual(compression["sounds/drop.mp3"], zipfile.ZIP_STORED)
+        self.assertEqual(compression["index.html"], zipfile.ZIP_DEFLATED)
+        self.assertEqual(compression["forced.png"], zipfile.ZIP_DEFLATED)
+
+
+class TestArchiveCache(unittest.TestCase):
+    """Test storing and restoring built archives by key."""
+
+    def test_store_and_restore(self):
+        """Test that a stored archive is restored for the same key only."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, "cache", "archives")
+            output_path = os.path.join(temp_dir, "book.epub")
+
+            self.assertFalse(restore_archive(cache_dir, "abc", output_path))
+
+            with open(output_path, "wb") as f:
+                f.write(b"epub")
+            store_archive(cache_dir, "abc", output_path)
+            os.remove(output_path)
+
+            self.assertFalse(restore_archive(cache_dir, "def", output_path))
+            self.assertFalse(os.path.exists(output_path))
+
+            self.assertTrue(restore_archive(cache_dir, "abc", output_path))
+            with open(output_path, "rb") as f:
+                self.assertEqual(f.read(), b"epub")
+
+    def test_store_keeps_latest(self):
+        """Test that storing an archive replaces older archives for the same output only."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, "cache", "archives")
+            book_path = os.path.join(temp_dir, "book.epub")
+            other_path = os.path.join(temp_dir, "other.epub")
+
+            for path in (book_path, other_path):
+                with open(path, "wb") as f:
+                    f.write(b"epub")
+
+            store_archive(cache_dir, "abc", book_path)
+            store_archive(cache_dir, "abc", other_path)
+            store_archive(cache_dir, "def", book_path)
+
+            self.assertEqual(os.listdir(os.path.join(cache_dir, "book.epub")), ["def.epub"])
+            self.assertEqual(os.listdir(os.path.join(cache_dir, "other.epub")), ["abc.epub"])
+            self.assertFalse(restore_archive(cache_dir, "abc", book_path))
+            self.assertTrue(restore_archive(cache_dir, "abc", other_path))
+
+
+class TestCodeFingerprint(unittest.TestCase):
+    """Test fingerprinting the code that builds an archive."""
+
+    def test_fingerprint(self):
+        """Test that the fingerprint depends on the source files of the objects passed in, not the objects themselves."""
+        self.assertEqual(code_fingerprint(store_archive), code_fingerprint(restore_archive, MediaZipFile))
+        self.assertNotEqual(code_fingerprint(store_archive), code_fingerprint(unittest))
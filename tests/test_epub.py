@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from ebooklib import epub
+
+from adt_press.models.epub import MediaEpubWriter
+
+
+class TestMediaEpubWriter(unittest.TestCase):
+    """Test MediaEpubWriter stores media as-is while keeping the epub layout valid."""
+
+    def test_write(self):
+        """Test that the mimetype comes first and stored uncompressed, images are stored and chapters deflated."""
+        book = epub.EpubBook()
+        book.set_identifier("adt-press-test")
+        book.set_title("Test")
+        book.set_language("en")
+
+        book.add_item(epub.EpubItem(uid="img", file_name="images/img.png", media_type="image/png", content=b"png"))
+        chapter = epub.EpubHtml(title="Section 1", file_name="chap_1.xhtml", lang="en")
+        chapter.content = "<p>Hello</p>"
+        book.add_item(chapter)
+        book.add_item(epub.EpubNav())
+        book.spine = ["nav", chapter]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "test.epub")
+            writer = MediaEpubWriter(output_path, book)
+            writer.process()
+            writer.write()
+
+            with zipfile.ZipFile(output_path) as archive:
+                infos = archive.infolist()
+                compression = {info.filename: info.compress_type for info in infos}
+                self.assertEqual(archive.read("EPUB/images/img.png"), b"png")
+
+        self.assertEqual(infos[0].filename, "mimetype")
+        self.assertEqual(compression["mimetype"], zipfile.ZIP_STORED)
+        self.assertEqual(compression["EPUB/images/img.png"], zipfile.ZIP_STORED)
+        self.assertEqual(compression["EPUB/chap_1.xhtml"], zipfile.ZIP_DEFLATED)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from adt_press.llm.text_translation import get_text_translations_batch
+from adt_press.models.config import PromptConfig
+from adt_press.models.text import OutputText
+
+CONFIG = PromptConfig(model="openai/gpt-4o", template_path="prompts/text_translation.jinja2", batch_mode="batch")
+
+REQUESTS = [
+    ([("t1", "section_text", "Hello")], "en", "es"),
+    ([("t2", "section_text", "Goodbye")], "en", "es"),
+]
+
+
+def batch_line(custom_id: str, translations: list[dict]) -> str:
+    """A line of batch output holding a translation response."""
+    content = json.dumps({"reasoning": "because", "translations": translations})
+    return json.dumps({"custom_id": custom_id, "response": {"body": {"choices": [{"message": {"content": content}}]}}})
+
+
+@patch("adt_press.llm.text_translation.BATCH_POLL_SECONDS", 0)
+@patch("adt_press.llm.text_translation.get_text_translation", new_callable=AsyncMock)
+@patch("litellm.afile_content", new_callable=AsyncMock)
+@patch("litellm.aretrieve_batch", new_callable=AsyncMock)
+@patch("litellm.acreate_batch", new_callable=AsyncMock)
+@patch("litellm.acreate_file", new_callable=AsyncMock)
+class TestTextTranslationsBatch(unittest.TestCase):
+    """Test translating groups of texts through the batch API."""
+
+    def setUp(self):
+        self.fallback = [OutputText(text_id="t2", text_type="section_text", text="Sync", reasoning="sync", language_code="es")]
+
+    def run_batch(self, create_file, create_batch, retrieve_batch, file_content, get_text_translation, status, lines):
+        create_file.return_value = SimpleNamespace(id="file-in")
+        create_batch.return_value = SimpleNamespace(id="batch", status="in_progress", output_file_id=None, error_file_id=None)
+        output_file_id = "file-out" if lines is not None else None
+        retrieve_batch.return_value = SimpleNamespace(id="batch", status=status, output_file_id=output_file_id, error_file_id="file-err")
+        file_content.return_value = SimpleNamespace(text="\n".join(lines or []))
+        get_text_translation.return_value = self.fallback
+
+        return asyncio.run(get_text_translations_batch(CONFIG, REQUESTS))
+
+    def test_all_succeed(self, create_file, create_batch, retrieve_batch, file_content, get_text_translation):
+        """Test that every request is answered from the batch output."""
+        lines = [
+            batch_line("1", [{"text_id": "t2", "text": "Adiós"}]),
+            batch_line("0", [{"text_id": "t1", "text": "Hola"}]),
+        ]
+        results = self.run_batch(create_file, create_batch, retrieve_batch, file_content, get_text_translation, "completed", lines)
+
+        self.assertEqual([[text.text for text in result] for result in results], [["Hola"], ["Adiós"]])
+        self.assertEqual(results[0][0].language_code, "es")
+        get_text_translation.assert_not_called()
+
+        # both requests went out in a single batch file
+        _, batch_content = create_file.call_args.kwargs["file"]
+        self.assertEqual([json.loads(line)["custom_id"] for line in batch_content.decode("utf-8").splitlines()], ["0", "1"])
+
+    def test_answered_requests_not_throttled(self, create_file, create_batch, retrieve_batch, file_content, get_text_translation):
+        """Test that requests answered by the batch are returned without waiting on the rate limiter."""
+        requests = [([(f"t{idx}", "section_text", "Hello")], "en", "es") for idx in range(40)]
+        config = CONFIG.model_copy(update={"rate_limit": 60})
+        lines = [batch_line(str(idx), [{"text_id": f"t{idx}", "text": "Hola"}]) for idx in range(40)]
+
+        create_file.return_value = SimpleNamespace(id="file-in")
+        create_batch.return_value = SimpleNamespace(id="batch", status="completed", output_file_id="file-out", error_file_id=None)
+        file_content.return_value = SimpleNamespace(text="\n".join(lines))
+
+        start = time.monotonic()
+        results = asyncio.run(get_text_translations_batch(config, requests))
+
+        # at 60 requests a minute, throttling 40 requests would take the better part of a minute
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual([result[0].text_id for result in results], [f"t{idx}" for idx in range(40)])
+        get_text_translation.assert_not_called()
+
+    def test_invalid_line_falls_back(self, create_file, create_batch, retrieve_batch, file_content, get_text_translation):
+        """Test that a request with a missing translation is retried synchronously."""
+        lines = [
+            batch_line("0", [{"text_id": "t1", "text": "Hola"}]),
+            batch_line("1", [{"text_id": "t3", "text": "Adiós"}]),
+        ]
+        results = self.run_batch(create_file, create_batch, retrieve_batch, file_content, get_text_translation, "completed", lines)
+
+        self.assertEqual(results[0][0].text, "Hola")
+        self.assertEqual(results[1], self.fallback)
+        get_text_translation.assert_called_once_with(CONFIG, REQUESTS[1][0], "en", "es")
+
+    def test_missing_line_falls_back(self, create_file, create_batch, retrieve_batch, file_content, get_text_translation):
+        """Test that a request missing from the batch output is retried synchronously."""
+        lines = [batch_line("0", [{"text_id": "t1", "text": "Hola"}])]
+        results = self.run_batch(create_file, create_batch, retrieve_batch, file_content, get_text_translation, "completed", lines)
+
+        self.assertEqual(results[0][0].text, "Hola")
+        self.assertEqual(results[1], self.fallback)
+        get_text_translation.assert_called_once_with(CONFIG, REQUESTS[1][0], "en", "es")
+
+    def test_failed_batch_falls_back(self, create_file, create_batch, retrieve_batch, file_content, get_text_translation):
+        """Test that every request is retried synchronously when the batch fails or expires."""
+        for status in ("failed", "expired"):
+            get_text_translation.reset_mock()
+            file_content.reset_mock()
+
+            results = self.run_batch(create_file, create_batch, retrieve_batch, file_content, get_text_translation, status, None)
+
+            self.assertEqual(results, [self.fallback, self.fallback])
+            self.assertEqual(get_text_translation.call_count, 2)
+            file_content.assert_not_called()
@@ -1,10 +1,21 @@
+import sys
 from typing import Any
 
 from pydantic import BaseModel
+from pydantic.dataclasses import dataclass
+from pydantic_core import to_json
 
+# slotted dataclasses are only available from Python 3.10
+SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-class Image(BaseModel):
-    """Represents an extracted image from a PDF page."""
+
+@dataclass(**SLOTS)
+class Image:
+    """Represents an extracted image from a PDF page.
+
+    This is the most numerous model in an extraction, so it is a slotted dataclass
+    rather than a BaseModel to keep per-instance memory and construction cost down.
+    """
 
     image_id: str
     page_id: str
@@ -67,5 +78,6 @@ class PDFExtract(BaseModel):
 
     def save_to_file(self, filepath: str) -> None:
         """Save extraction result to JSON file."""
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(self.to_json())
+        # write the serialized UTF-8 bytes directly, skipping the intermediate str and re-encode
+        with open(filepath, "wb") as f:
+            f.write(to_json(self, indent=2))
@@ -10,19 +10,47 @@ Usage:
 """
 
 import argparse
+import hashlib
+import io
 import os
+import shutil
 import sys
 import traceback
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from itertools import repeat
+from typing import Optional, Union
 
+import numpy as np
+import PIL.Image
 import pymupdf  # PyMuPDF
 
 from models import Image, Metadata, Page, PDFExtract
 from utils import matplotlib_chart, render_drawings, write_file
 
-# We need to set this zoom for PyMuPDF or the image is pixelated.
-FITZ_ZOOM = 2
-FITZ_MAT = pymupdf.Matrix(FITZ_ZOOM, FITZ_ZOOM)
+# PDFs are laid out at 72 points per inch, we render at twice that by default or the image is pixelated.
+PDF_DPI = 72
+DEFAULT_TARGET_DPI = 144
+
+# How many threads write extracted files to disk while we keep rasterizing
+IO_WORKERS = 4
+
+# Charts of our most recently charted images by a digest of the image they were made from, so images repeated
+# across pages are usually only charted once per process
+CHART_CACHE: dict[bytes, bytes] = {}
+MAX_CHART_CACHE = 64
+
+# Raster images we've extracted by document path and xref, to the paths we saved them and their chart to and their
+# size, so images repeated across pages are only decoded, encoded and charted once per process
+RASTER_CACHE: dict[tuple[str, int], tuple[str, str, int, int]] = {}
+
+# Stitched spread buffers by shape, reused since spreads in a book are usually the same size
+STITCH_BUFFERS: dict[tuple[int, ...], np.ndarray] = {}
+MAX_STITCH_BUFFERS = 2
+
+# PyMuPDF documents can't be shared across processes, so each worker process opens its own
+WORKER_DOC: Optional[pymupdf.Document] = None
 
 
 def get_page_groupings(start_page: int, end_page: int, spread_mode: bool) -> list[tuple[int, ...]]:
@@ -50,39 +78,98 @@ def get_page_groupings(start_page: int, end_page: int, spread_mode: bool) -> lis
     if not spread_mode:
         return [(page,) for page in range(start_page, end_page + 1)]
 
-    groupings = []
+    groupings: list[tuple[int, ...]] = []
     current = start_page
 
-    while current <= end_page:
-        if current == 1:
-            # Page 1 is always solo (cover)
-            groupings.append((1,))
-            current += 1
-        elif current % 2 == 0:
-            # Even page: check if we can pair with next odd page
-            if current + 1 <= end_page:
-                # Pair even page with following odd page (2-3, 4-5, 6-7, etc.)
-                groupings.append((current, current + 1))
-                current += 2
-            else:
-                # Even page at end of range, solo
-                groupings.append((current,))
-                current += 1
-        else:
-            # Odd page (not page 1): solo because it's not paired with preceding even
-            groupings.append((current,))
-            current += 1
+    # Page 1 is always solo (cover), as is an odd starting page since its even partner is out of range
+    if current % 2 == 1 and current <= end_page:
+        groupings.append((current,))
+        current += 1
+
+    # Pair each even page with the following odd page (2-3, 4-5, 6-7, etc.), an even page at the end is solo
+    groupings.extend((page, page + 1) if page < end_page else (page,) for page in range(current, end_page + 1, 2))
 
     return groupings
 
 
-def stitch_page_images(doc: pymupdf.Document, page_indices: list[int]) -> bytes:
+def _pixmap_array(pix: pymupdf.Pixmap) -> np.ndarray:
+    """Views the samples of a pixmap as a height x width x channels array without copying."""
+    return np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+
+def _encode_png(pixels: np.ndarray, fp: Union[str, io.BytesIO]) -> None:
+    """Encodes pixels as PNG with the fastest zlib level, our PNGs are used locally so speed matters more than size."""
+    if pixels.shape[2] == 1:
+        pixels = pixels[:, :, 0]
+
+    PIL.Image.fromarray(pixels).save(fp, format="PNG", compress_level=1)
+
+
+def _fast_png(pixels: np.ndarray) -> bytes:
+    """Returns the pixels encoded as PNG bytes."""
+    buffer = io.BytesIO()
+    _encode_png(pixels, buffer)
+    return buffer.getvalue()
+
+
+def save_pixmap_png(path: str, pix: pymupdf.Pixmap) -> None:
+    """Encodes a pixmap as PNG straight to the file at path, without holding the PNG bytes in memory."""
+    _encode_png(_pixmap_array(pix), path)
+
+
+def _copy_when_written(pending: Optional[Future], source: str, destination: str) -> None:
+    """Copies source to destination once the pending write of source, if any, is done."""
+    if pending is not None:
+        pending.result()
+    shutil.copyfile(source, destination)
+
+
+def _chart(pixels: np.ndarray) -> bytes:
+    """Returns the matplotlib chart for the image pixels, reusing it if we've charted the same image before."""
+    digest = hashlib.blake2b(str(pixels.shape).encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(pixels))
+    key = digest.digest()
+
+    chart_bytes = CHART_CACHE.pop(key, None)
+    if chart_bytes is None:
+        chart_bytes = matplotlib_chart(pixels)
+
+    # keep our most recently used charts last, dropping the oldest beyond our limit
+    CHART_CACHE[key] = chart_bytes
+    while len(CHART_CACHE) > MAX_CHART_CACHE:
+        del CHART_CACHE[next(iter(CHART_CACHE))]
+
+    return chart_bytes
+
+
+def _stitch_buffer(shape: tuple[int, ...]) -> np.ndarray:
+    """Returns a buffer of the given shape for stitching, reusing our most recently used ones."""
+    buffer = STITCH_BUFFERS.pop(shape, None)
+    if buffer is None:
+        buffer = np.empty(shape, dtype=np.uint8)
+
+    # keep our most recently used buffers last, dropping the oldest beyond our limit
+    STITCH_BUFFERS[shape] = buffer
+    while len(STITCH_BUFFERS) > MAX_STITCH_BUFFERS:
+        del STITCH_BUFFERS[next(iter(STITCH_BUFFERS))]
+
+    return buffer
+
+
+def _dpi_matrix(target_dpi: int) -> pymupdf.Matrix:
+    """Returns the matrix to render pages at the target DPI."""
+    zoom = target_dpi / PDF_DPI
+    return pymupdf.Matrix(zoom, zoom)
+
+
+def stitch_page_images(doc: pymupdf.Document, page_indices: list[int], mat: pymupdf.Matrix) -> bytes:
     """
     Stitch multiple page images together horizontally.
 
     Args:
         doc: PyMuPDF document
         page_indices: List of 0-based page indices to stitch
+        mat: Matrix to render each page with
 
     Returns:
         PNG bytes of stitched image
@@ -90,36 +177,34 @@ def stitch_page_images(doc: pymupdf.Document, page_indices: list[int]) -> bytes:
     if len(page_indices) == 1:
         # Single page, just return the pixmap
         page = doc[page_indices[0]]
-        pix = page.get_pixmap(matrix=FITZ_MAT)
-        return pix.tobytes(output="png")
+        pix = page.get_pixmap(matrix=mat)
+        return _fast_png(_pixmap_array(pix))
 
     # Get pixmaps for all pages
-    pixmaps = [doc[idx].get_pixmap(matrix=FITZ_MAT) for idx in page_indices]
+    pixmaps = [doc[idx].get_pixmap(matrix=mat) for idx in page_indices]
 
     # Calculate dimensions
     total_width = sum(pix.width for pix in pixmaps)
     max_height = max(pix.height for pix in pixmaps)
-
-    # Create a new pixmap for the stitched image
-    stitched = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, total_width, max_height), False)
-    stitched.clear_with(value=255)  # White background
+    stitched = _stitch_buffer((max_height, total_width, pixmaps[0].n))
 
     # Copy each page image into the stitched image
     x_offset = 0
     for pix in pixmaps:
-        # Calculate vertical offset to center the page if heights differ
+        # Center the page on a white background if heights differ
         y_offset = (max_height - pix.height) // 2
-        stitched.copy(pix, pymupdf.IRect(x_offset, y_offset, x_offset + pix.width, y_offset + pix.height))
-        x_offset += pix.width
+        y_end = y_offset + pix.height
+        columns = slice(x_offset, x_offset + pix.width)
+        stitched[:y_offset, columns] = 255
+        stitched[y_end:, columns] = 255
 
-    result = stitched.tobytes(output="png")
+        stitched[y_offset:y_end, columns] = _pixmap_array(pix)
+        x_offset += pix.width
 
-    # Clean up
-    for pix in pixmaps:
-        pix = None
-    stitched = None
+    # the pages are all copied, so let their pixmaps go before we encode
+    del pixmaps, pix
 
-    return result
+    return _fast_png(stitched)
 
 
 def concatenate_page_text(doc: pymupdf.Document, page_indices: list[int]) -> str:
@@ -143,6 +228,9 @@ def extract_images_from_pages(
     page_id: str,
     images_dir: str,
     quiet: bool = False,
+    write: Callable[[str, bytes], object] = write_file,
+    save_png: Callable[[str, pymupdf.Pixmap], object] = save_pixmap_png,
+    copy: Callable[[str, str], object] = shutil.copyfile,
 ) -> list[Image]:
     """
     Extract images from multiple pages (for spread mode).
@@ -153,6 +241,9 @@ def extract_images_from_pages(
         page_id: ID for the spread (e.g., 'p2_3')
         images_dir: Directory to save images
         quiet: Whether to suppress output
+        write: Function used to write each file, defaults to writing synchronously
+        save_png: Function used to save each raster image, defaults to saving synchronously
+        copy: Function used to copy repeated raster images and their charts, defaults to copying synchronously
 
     Returns:
         List of Image objects
@@ -160,53 +251,72 @@ def extract_images_from_pages(
     images = []
     image_index = 0
 
+    # join our paths by prefix, we build several per image
+    images_prefix = images_dir + os.sep
+    relative_prefix = "images" + os.sep
+
     for page_idx in page_indices:
         fitz_page = doc[page_idx]
         page_number = page_idx + 1
 
         # Extract raster images
         for img in fitz_page.get_images(full=True):
-            pix = pymupdf.Pixmap(doc, img[0])
-            pix_rgb = pymupdf.Pixmap(pymupdf.csRGB, pix)
             img_id = f"img_{page_id}_r{image_index}"
-            img_bytes = pix_rgb.tobytes(output="png")
-
-            # Save original image
             img_filename = f"{img_id}.png"
-            img_path = os.path.join(images_dir, img_filename)
-            write_file(img_path, img_bytes)
-
-            # Save chart version
+            img_path = f"{images_prefix}{img_filename}"
             chart_filename = f"{img_id}_chart.png"
-            chart_path = os.path.join(images_dir, chart_filename)
-            chart_bytes = matplotlib_chart(img_bytes)
-            write_file(chart_path, chart_bytes)
+            chart_path = f"{images_prefix}{chart_filename}"
+
+            # documents opened from memory have no name, so we can only reuse images from ones opened by path
+            cache_key = (doc.name, img[0])
+            cached = RASTER_CACHE.get(cache_key) if doc.name else None
+
+            if cached is None:
+                pix = pymupdf.Pixmap(doc, img[0])
+
+                # only convert when we need to, most images are already device RGB but Lab or ICC spaces still need it
+                if pix.colorspace and pix.colorspace.name == pymupdf.csRGB.name and not pix.alpha:
+                    pix_rgb = pix
+                else:
+                    pix_rgb = pymupdf.Pixmap(pymupdf.csRGB, pix)
+
+                # Save original image
+                save_png(img_path, pix_rgb)
+
+                # Save chart version
+                write(chart_path, _chart(_pixmap_array(pix_rgb)))
+                width, height = pix_rgb.width, pix_rgb.height
+
+                if doc.name:
+                    RASTER_CACHE[cache_key] = (img_path, chart_path, width, height)
+            else:
+                # We've extracted this image before, copy what we saved then
+                source_path, source_chart_path, width, height = cached
+                copy(source_path, img_path)
+                copy(source_chart_path, chart_path)
 
             images.append(
                 Image(
                     image_id=img_id,
                     page_id=page_id,
                     index=image_index,
-                    image_path=os.path.join("images", img_filename),
-                    chart_path=os.path.join("images", chart_filename),
-                    width=pix_rgb.width,
-                    height=pix_rgb.height,
+                    image_path=f"{relative_prefix}{img_filename}",
+                    chart_path=f"{relative_prefix}{chart_filename}",
+                    width=width,
+                    height=height,
                     image_type="raster",
                 )
             )
             image_index += 1
 
-            # Clean up pixmaps
-            pix_rgb = None
-            pix = None
-
         # Extract vector drawings
         drawings = fitz_page.get_drawings(extended=True)
 
         if not quiet:
-            print(f"  Page {page_number}: Found {len(drawings)} drawings")
-            drawable_count = len([d for d in drawings if d.get("type") not in ["clip", "group"]])
-            print(f"  Page {page_number}: Drawable items: {drawable_count}")
+            drawable_count = sum(1 for d in drawings if d.get("type") not in ("clip", "group"))
+            print(
+                f"  Page {page_number}: Found {len(drawings)} drawings\n  Page {page_number}: Drawable items: {drawable_count}"
+            )
 
         try:
             vector_images = render_drawings(
@@ -233,22 +343,22 @@ def extract_images_from_pages(
 
             # Save vector image
             vector_filename = f"{img_id}.png"
-            vector_path = os.path.join(images_dir, vector_filename)
-            write_file(vector_path, vector_img.image)
+            vector_path = f"{images_prefix}{vector_filename}"
+            write(vector_path, vector_img.image)
 
             # Save chart version
             chart_filename = f"{img_id}_chart.png"
-            chart_path = os.path.join(images_dir, chart_filename)
-            chart_bytes = matplotlib_chart(vector_img.image)
-            write_file(chart_path, chart_bytes)
+            chart_path = f"{images_prefix}{chart_filename}"
+            chart_bytes = _chart(np.asarray(PIL.Image.open(io.BytesIO(vector_img.image))))
+            write(chart_path, chart_bytes)
 
             images.append(
                 Image(
                     image_id=img_id,
                     page_id=page_id,
                     index=image_index,
-                    image_path=os.path.join("images", vector_filename),
-                    chart_path=os.path.join("images", chart_filename),
+                    image_path=f"{relative_prefix}{vector_filename}",
+                    chart_path=f"{relative_prefix}{chart_filename}",
                     width=vector_img.width,
                     height=vector_img.height,
                     image_type="vector",
@@ -259,8 +369,116 @@ def extract_images_from_pages(
     return images
 
 
+def extract_page_group(
+    doc: pymupdf.Document,
+    page_group: tuple[int, ...],
+    pages_dir: str,
+    images_dir: str,
+    quiet: bool = False,
+    target_dpi: int = DEFAULT_TARGET_DPI,
+) -> Page:
+    """
+    Extract a single page group (one page, or a spread of pages) from the PDF.
+
+    Args:
+        doc: PyMuPDF document
+        page_group: 1-based page numbers to extract together
+        pages_dir: Directory to save page images
+        images_dir: Directory to save images
+        quiet: Whether to suppress output
+        target_dpi: Resolution to render page images at
+
+    Returns:
+        Page object for the group
+    """
+    # Create page ID
+    if len(page_group) == 1:
+        page_id = f"p{page_group[0]}"
+        page_number = page_group[0]
+    else:
+        page_id = f"p{'_'.join(str(p) for p in page_group)}"
+        page_number = page_group[0]  # Use first page number for reference
+
+    # Convert to 0-based indices
+    page_indices = [p - 1 for p in page_group]
+
+    # Extract page image (stitched for spreads)
+    if len(page_group) == 1:
+        page_image_filename = f"page_{page_group[0]}.png"
+    else:
+        page_image_filename = f"page_{'_'.join(str(p) for p in page_group)}.png"
+
+    # write our files in the background so we can keep rasterizing, waiting for them all before returning
+    writes: list[Future] = []
+    writes_by_path: dict[str, Future] = {}
+
+    # pixmaps being saved in the background, we hold on to them here so they are only ever freed on our thread
+    saving: list[pymupdf.Pixmap] = []
+
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as io_pool:
+
+        def write(path: str, data: bytes) -> None:
+            writes_by_path[path] = io_pool.submit(write_file, path, data)
+            writes.append(writes_by_path[path])
+
+        # we view the samples here since PyMuPDF isn't thread safe, the task only touches the pixels
+        def save_png(path: str, pix: pymupdf.Pixmap) -> None:
+            saving.append(pix)
+            writes_by_path[path] = io_pool.submit(_encode_png, _pixmap_array(pix), path)
+            writes.append(writes_by_path[path])
+
+        # a copy waits for its source to be written, which was submitted before it so never queues behind it
+        def copy(source: str, destination: str) -> None:
+            writes.append(io_pool.submit(_copy_when_written, writes_by_path.get(source), source, destination))
+
+        page_image_path = os.path.join(pages_dir, page_image_filename)
+        page_image_bytes = stitch_page_images(doc, page_indices, _dpi_matrix(target_dpi))
+        write(page_image_path, page_image_bytes)
+
+        # Extract text (concatenated for spreads)
+        page_text = concatenate_page_text(doc, page_indices)
+
+        # Extract images from all pages in the group
+        images = extract_images_from_pages(doc, page_indices, page_id, images_dir, quiet, write, save_png, copy)
+
+    # our saves are all done, so we can let their pixmaps go
+    saving.clear()
+
+    # raise any errors from our writes
+    for future in writes:
+        future.result()
+
+    return Page(
+        page_id=page_id,
+        page_number=page_number,
+        page_image_path=os.path.join("pages", page_image_filename),
+        text=page_text,
+        images=images,
+    )
+
+
+def _init_worker(pdf_path: str) -> None:
+    """Open the document once per worker process."""
+    global WORKER_DOC
+    WORKER_DOC = pymupdf.open(pdf_path, filetype="pdf")
+
+
+def _extract_page_group_worker(
+    page_group: tuple[int, ...], pages_dir: str, images_dir: str, quiet: bool, target_dpi: int
+) -> Page:
+    """Extract a page group in a worker process using its own document."""
+    assert WORKER_DOC is not None, "worker document not initialized"
+    return extract_page_group(WORKER_DOC, page_group, pages_dir, images_dir, quiet, target_dpi)
+
+
 def extract_pages_from_pdf(
-    output_dir: str, pdf_path: str, start_page: int, end_page: int, spread_mode: bool = False, quiet: bool = False
+    output_dir: str,
+    pdf_path: str,
+    start_page: int,
+    end_page: int,
+    spread_mode: bool = False,
+    quiet: bool = False,
+    target_dpi: int = DEFAULT_TARGET_DPI,
 ) -> PDFExtract:
     """
     Extract pages from PDF file and return structured data.
@@ -272,6 +490,7 @@ def extract_pages_from_pdf(
         end_page: Ending page number (1-based, 0 means end of document)
         spread_mode: Whether to extract as spreads (first page solo, then pairs)
         quiet: Whether to suppress progress output
+        target_dpi: Resolution to render page images at
 
     Returns:
         PDFExtract containing all extracted data
@@ -285,11 +504,8 @@ def extract_pages_from_pdf(
     os.makedirs(pages_dir, exist_ok=True)
     os.makedirs(images_dir, exist_ok=True)
 
-    # Open PDF
-    with open(pdf_path, "rb") as f:
-        pdf_bytes = f.read()
-
-    doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    # Open PDF, letting PyMuPDF read from the file as needed rather than holding it all in memory
+    doc = pymupdf.open(pdf_path, filetype="pdf")
 
     # Determine page range
     total_pages = len(doc)
@@ -305,50 +521,30 @@ def extract_pages_from_pdf(
     # Get page groupings based on mode
     page_groupings = get_page_groupings(start_page, end_page, spread_mode)
 
-    pages = []
-    extracted_page_numbers = []
-
-    for page_group in page_groupings:
-        # Create page ID and track page numbers
-        if len(page_group) == 1:
-            page_id = f"p{page_group[0]}"
-            page_number = page_group[0]
-        else:
-            page_id = f"p{'_'.join(str(p) for p in page_group)}"
-            page_number = page_group[0]  # Use first page number for reference
-
-        extracted_page_numbers.extend(page_group)
-
-        # Convert to 0-based indices
-        page_indices = [p - 1 for p in page_group]
-
-        # Extract page image (stitched for spreads)
-        if len(page_group) == 1:
-            page_image_filename = f"page_{page_group[0]}.png"
-        else:
-            page_image_filename = f"page_{'_'.join(str(p) for p in page_group)}.png"
-
-        page_image_path = os.path.join(pages_dir, page_image_filename)
-        page_image_bytes = stitch_page_images(doc, page_indices)
-        write_file(page_image_path, page_image_bytes)
-
-        # Extract text (concatenated for spreads)
-        page_text = concatenate_page_text(doc, page_indices)
-
-        # Extract images from all pages in the group
-        images = extract_images_from_pages(doc, page_indices, page_id, images_dir, quiet)
-
-        # Create page object
-        pages.append(
-            Page(
-                page_id=page_id,
-                page_number=page_number,
-                page_image_path=os.path.join("pages", page_image_filename),
-                text=page_text,
-                images=images,
+    extracted_page_numbers = [page for page_group in page_groupings for page in page_group]
+
+    # groups are independent and CPU bound in rasterizing and encoding, so extract them in parallel,
+    # starting spreads first so the larger groups don't end up running alone at the end
+    schedule = sorted(page_groupings, key=len, reverse=True)
+    max_workers = max(1, min(len(page_groupings), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(pdf_path,)) as executor:
+        extracted = dict(
+            zip(
+                schedule,
+                executor.map(
+                    _extract_page_group_worker,
+                    schedule,
+                    repeat(pages_dir),
+                    repeat(images_dir),
+                    repeat(quiet),
+                    repeat(target_dpi),
+                ),
             )
         )
 
+    # put our pages back in document order
+    pages = [extracted[page_group] for page_group in page_groupings]
+
     # Create metadata
     pdf_metadata = Metadata(
         filename=os.path.basename(pdf_path),
@@ -414,6 +610,13 @@ Spread Mode:
         help="Extract pages as spreads (first page solo, then pairs of pages combined)",
     )
 
+    parser.add_argument(
+        "--target_dpi",
+        type=int,
+        default=DEFAULT_TARGET_DPI,
+        help=f"Resolution to render page images at (default: {DEFAULT_TARGET_DPI})",
+    )
+
     parser.add_argument("--quiet", action="store_true", help="Suppress progress output")
 
     args = parser.parse_args()
@@ -423,6 +626,10 @@ Spread Mode:
         print(f"Error: PDF file not found: {args.pdf_path}", file=sys.stderr)
         sys.exit(1)
 
+    if args.target_dpi <= 0:
+        print(f"Error: target DPI must be positive: {args.target_dpi}", file=sys.stderr)
+        sys.exit(1)
+
     try:
         if not args.quiet:
             print(f"Extracting from: {args.pdf_path}")
@@ -438,6 +645,7 @@ Spread Mode:
             end_page=args.end_page,
             spread_mode=args.spread_mode,
             quiet=args.quiet,
+            target_dpi=args.target_dpi,
         )
 
         # Save results to JSON
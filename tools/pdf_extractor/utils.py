@@ -12,6 +12,7 @@ import cairo
 import matplotlib.pyplot as plt
 import numpy as np
 import PIL.Image
+from matplotlib.image import pil_to_array
 
 # Configure matplotlib for headless operation
 plt.switch_backend("Agg")
@@ -32,13 +33,12 @@ def write_file(output_path: str, data: bytes, suffix: str = "") -> str:
     return output_path
 
 
-def matplotlib_chart(img_bytes: bytes) -> bytes:
-    """Generates a matplotlib chart from the image bytes and returns it as PNG bytes."""
+def matplotlib_chart(pixels: np.ndarray) -> bytes:
+    """Generates a matplotlib chart from the image pixels and returns it as PNG bytes."""
 
-    image = PIL.Image.open(io.BytesIO(img_bytes))
     fig, ax = plt.subplots(figsize=(10, 6), dpi=150)
 
-    ax.imshow(image)
+    ax.imshow(pixels)
 
     # Increase the density of coordinates on the axes
     x_ticks = ax.get_xticks()
@@ -48,12 +48,17 @@ def matplotlib_chart(img_bytes: bytes) -> bytes:
     plt.xticks(rotation=45)
 
     buffer = io.BytesIO()
-    plt.savefig(buffer, format="png")
+    plt.savefig(buffer, format="png", pil_kwargs={"compress_level": 1})
     plt.close(fig)
     buffer.seek(0)
     return buffer.getvalue()
 
 
+def matplotlib_chart_from_bytes(img_bytes: bytes) -> bytes:
+    """Generates a matplotlib chart from the encoded image bytes and returns it as PNG bytes."""
+    return matplotlib_chart(pil_to_array(PIL.Image.open(io.BytesIO(img_bytes))))
+
+
 class RenderedVectorImage:
     """Simple class to hold rendered vector image data."""
 